@@ -0,0 +1,67 @@
+"""
+Compare writing a large ``.env`` file into ``os.environ`` key by key with
+parsing it into a private mapping and applying the values in one step.
+
+Run from the repository root::
+
+    python benchmarks/apply.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import speckenv
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    for keys in (100, 1000, 10000):
+        with tempfile.NamedTemporaryFile("w", suffix=".env", delete=False) as f:
+            f.writelines(f"SPECKENV_BENCH_{i}=value-{i}\n" for i in range(keys))
+        values = speckenv.parse_speckenv(Path(f.name).read_text())
+
+        def cleanup(values=values):
+            for key in values:
+                os.environ.pop(key, None)
+
+        def per_key(path=f.name):
+            for key, value in speckenv.parse_speckenv(Path(path).read_text()).items():
+                os.environ.setdefault(key, value)
+
+        def private(path=f.name):
+            speckenv.read_speckenv(path, mapping={})
+
+        def bulk(path=f.name):
+            mapping = {}
+            speckenv.read_speckenv(path, mapping=mapping)
+            speckenv.apply_speckenv(mapping)
+
+        try:
+            results = []
+            for function in (per_key, private, bulk):
+                cleanup()
+                results.append(timed(function))
+            print(
+                f"{keys:>6} keys:"
+                f" per-key setdefault {results[0] * 1e3:8.2f}ms,"
+                f" private mapping {results[1] * 1e3:8.2f}ms,"
+                f" private + bulk apply {results[2] * 1e3:8.2f}ms"
+            )
+        finally:
+            cleanup()
+            os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compare ``speckenv.literal_eval`` with ``ast.literal_eval`` per value type.
+
+Run from the repository root::
+
+    python benchmarks/literal_eval.py
+"""
+
+import ast
+import sys
+import timeit
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import speckenv
+
+
+VALUES = {
+    "bool": "True",
+    "none": "None",
+    "int": "42",
+    "float": "3.1415",
+    "string": '"postgres://localhost:5432/example_com"',
+    "list": "['localhost', '127.0.0.1', 'example.com']",
+    "tuple": "('a', 1, 2.5)",
+    "dict": "{'timeout': 10, 'retry': True}",
+    "fallback": "{'nested': [1, 2]}",
+}
+
+
+def main():
+    print(f"{'type':<10} {'ast':>10} {'speckenv':>10} {'speedup':>8}")
+    for name, value in VALUES.items():
+        assert speckenv.literal_eval(value) == ast.literal_eval(value)
+        number = 20000
+        slow = timeit.timeit(lambda v=value: ast.literal_eval(v), number=number)
+        fast = timeit.timeit(lambda v=value: speckenv.literal_eval(v), number=number)
+        print(
+            f"{name:<10} {slow / number * 1e6:>8.2f}us {fast / number * 1e6:>8.2f}us"
+            f" {slow / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
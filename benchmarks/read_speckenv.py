@@ -0,0 +1,75 @@
+"""
+Measure the throughput of ``read_speckenv`` in lines per second and compare
+it with the line based parser used up to speckenv 6.2.
+
+Run from the repository root::
+
+    python benchmarks/read_speckenv.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import speckenv
+
+
+def write_env(f, keys):
+    for i in range(keys):
+        if i % 10 == 0:
+            f.write(f"# Comment {i}\n")
+        value = (i, f'"string-{i}"', f"['a', {i}]", "True", f"plain-{i}  # x")[i % 5]
+        f.write(f"KEY_{i} = {value}\n")
+
+
+def read_speckenv_6_2(filename, *, mapping):
+    # The implementation of read_speckenv in speckenv 6.2
+    path = os.path.join(os.getcwd(), filename)
+    with open(path) as f:
+        lines = (line.strip() for line in f)
+        for line in lines:
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = tuple(v.strip(" \t") for v in line.split("=", 1))
+            mapping.setdefault(key, value)
+
+
+def measure(functions, path, rounds, repeat=10):
+    # Alternate between the functions and keep the best time of each so that
+    # noise affects all of them equally
+    best = [float("inf")] * len(functions)
+    for _ in range(repeat):
+        for i, function in enumerate(functions):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                function(path, mapping={})
+            best[i] = min(best[i], (time.perf_counter() - start) / rounds)
+    return best
+
+
+def main():
+    for keys in (10, 1000, 10000, 100000):
+        with tempfile.NamedTemporaryFile("w", suffix=".env", delete=False) as f:
+            write_env(f, keys)
+        try:
+            with open(f.name) as source:
+                lines = sum(1 for _ in source)
+            rounds = max(1, 50000 // keys)
+            new, old = measure(
+                [speckenv.read_speckenv, read_speckenv_6_2], f.name, rounds
+            )
+            print(
+                f"{keys:>7} keys: {lines / new:>12,.0f} lines/s"
+                f" (6.2: {lines / old:>12,.0f} lines/s, {old / new:.2f}x)"
+            )
+        finally:
+            os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,230 @@
 # Thanks to the authors of django-dotenv and django-getenv for the inspiration!
 
-import ast
+from __future__ import annotations
+
+# Only builtin modules and modules which are loaded at interpreter startup
+# anyway are imported here, everything else is imported on first use to keep
+# "import speckenv" cheap.
+import _operator
+import _thread
+import marshal
 import os
 import sys
-import warnings
-from collections.abc import MutableMapping
-from typing import Any, Callable, TypeVar, Union
+import time
+
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import weakref
+    from collections.abc import Mapping, MutableMapping, Sequence
+    from typing import Any, Callable, NoReturn, TypeVar
+
+    T = TypeVar("T")
+
+
+# [^\S\n] is any whitespace except newlines, the same characters the old
+# line based parser stripped
+_ASSIGNMENT_PATTERN = r"""
+    ^[^\S\n]*(?:export[^\S\n]+)?
+    ([^\s\#=](?:[^=\n]*[^\s=])?)[^\S\n]*=[^\S\n]*
+    (
+        # Unquoted values, the most common case first. Whitespace followed
+        # by a hash starts a comment
+        [^\s\#'"]\S*(?:[^\S\n]+[^\s\#]\S*)*
+      |
+        # Quoted values may span several lines
+        (?:
+            \"\"\"(?:[^"\\]|\\[\s\S]|"(?!""))*\"\"\"
+          | \'\'\'(?:[^'\\]|\\[\s\S]|'(?!''))*\'\'\'
+          | "[^"\\]*(?:\\[\s\S][^"\\]*)*"
+          | '[^'\\]*(?:\\[\s\S][^'\\]*)*'
+        )
+        (?=[^\S\n]*(?:\#[^\n]*)?$)
+      |
+        # Values starting with a hash directly after the equals sign or with
+        # a quote which isn't a complete string literal
+        (?:(?<=[^\S\n])[^\s\#]|(?<![^\S\n])\S)\S*(?:[^\S\n]+[^\s\#]\S*)*
+    )?
+    [^\S\n]*(?:\#[^\n]*)?$
+"""
+_ASSIGNMENT = None  # Compiled on first use
+
+
+def _compile_assignment():
+    global _ASSIGNMENT  # noqa: PLW0603
+    import re
+
+    _ASSIGNMENT = re.compile(_ASSIGNMENT_PATTERN, re.MULTILINE | re.VERBOSE)
+    return _ASSIGNMENT
+
+
+def parse_speckenv(text: str) -> dict[str, str]:
+    """
+    Parses the contents of a ``.env`` file and returns the raw values. The
+    first value wins if a key is defined more than once.
+
+    Quoted values keep their quotes so that ``env()`` evaluates them as
+    strings. Newlines in single-line string literals spanning several lines are
+    escaped.
+    """
+    pairs = (_ASSIGNMENT or _compile_assignment()).findall(text)
+    values = dict(pairs)
+    if len(values) != len(pairs):
+        # The first value wins
+        values = {}
+        for key, value in pairs:
+            values.setdefault(key, value)
+    # Only quoted values may contain newlines, checking the joined values is
+    # much faster than looking at each of them
+    if "\n" in "".join(values.values()):
+        for key, value in values.items():
+            if "\n" in value and value[1] != value[0]:
+                values[key] = value.replace("\n", "\\n")
+    return values
+
+
+_SNAPSHOT_VERSION = 1
+
+
+def _read_snapshot(path: str, snapshot: str) -> dict[str, str]:
+    """
+    Returns the parsed values of ``path``. Uses the marshalled ``snapshot`` if
+    the path, modification time and size still match and (re)writes it
+    otherwise. Files which only have been touched are recognized using the
+    hash of their contents and aren't parsed again.
+    """
+    stat = os.stat(path)
+    key = (_SNAPSHOT_VERSION, path, stat.st_mtime_ns, stat.st_size)
+    try:
+        with open(snapshot, "rb") as f:
+            cached = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        cached = None
+    if not isinstance(cached, tuple) or len(cached) != 6:
+        cached = None
+    elif cached[:4] == key:
+        return cached[5]
+
+    import hashlib
+
+    with open(path) as f:
+        text = f.read()
+    digest = hashlib.sha256(text.encode()).digest()
+    if cached is not None and cached[:2] == key[:2] and cached[4] == digest:
+        values = cached[5]
+    else:
+        values = parse_speckenv(text)
 
+    tmp = f"{snapshot}.{os.getpid()}.tmp"
+    try:
+        # The snapshot contains the same secrets as the file itself
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, stat.st_mode & 0o777)
+        with open(fd, "wb") as f:
+            marshal.dump((*key, digest, values), f)
+        os.replace(tmp, snapshot)
+    except OSError:
+        # The snapshot is only an optimization
+        import contextlib
+
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+    return values
 
-T = TypeVar("T")
+
+def _read(path: str, *, snapshot: bool | str) -> dict[str, str]:
+    if snapshot:
+        return _read_snapshot(
+            path, f"{path}.snapshot" if snapshot is True else snapshot
+        )
+    # Not sure whether we should try handling other encodings than ASCII
+    # at all...
+    with open(path) as f:
+        return parse_speckenv(f.read())
+
+
+def _files(filename: str | Sequence[str]) -> list[tuple[str, str]]:
+    """
+    Returns ``(filename, path)`` tuples of all existing files and warns about
+    the others.
+    """
+    filenames = [filename] if isinstance(filename, str) else filename
+    cwd = os.getcwd()
+    files = []
+    for name in filenames:
+        path = os.path.join(cwd, name)
+        if os.path.isfile(path):
+            files.append((name, path))
+        else:
+            import warnings
+
+            warnings.warn(f"{name} not a file, not reading anything", stacklevel=3)
+    return files
+
+
+def _merge(
+    files: list[tuple[str, str]], contents: list[dict[str, str]]
+) -> tuple[dict[str, str], dict[str, str] | str]:
+    """
+    Returns the merged values and a dictionary mapping keys to the file they
+    came from, or only the name of the file if there is just one.
+    """
+    if len(files) == 1:
+        # Skip another pass over all values in the common case
+        return contents[0], files[0][0]
+    values = {}
+    sources = {}
+    for (name, _path), content in zip(files, contents):
+        for key, value in content.items():
+            if key not in values:
+                values[key] = value
+                sources[key] = name
+    return values, sources
+
+
+# Same as threading.Lock() without importing threading
+_apply_lock = _thread.allocate_lock()
+
+
+def apply_speckenv(
+    values: Mapping[str, str], *, mapping: MutableMapping[str, str] = os.environ
+) -> dict[str, str]:
+    """
+    Writes ``values`` into ``os.environ`` (or a different ``mapping``) in one
+    bulk update if the keys do not exist already and returns the written
+    values.
+
+    Parse files with ``read_speckenv(mapping={})`` or use an ``EnvSnapshot``
+    to keep the process environment untouched and only export the values when
+    they are actually needed, for example before starting subprocesses.
+    Concurrent updates are serialized; readers see each key either missing or
+    with its final value.
+    """
+    with _apply_lock:
+        if mapping:
+            new = {key: value for key, value in values.items() if key not in mapping}
+        else:
+            new = dict(values)
+        mapping.update(new)
+    return new
+
+
+def _apply(
+    values: dict[str, str],
+    sources: dict[str, str] | str,
+    mapping: MutableMapping[str, str],
+) -> dict[str, str]:
+    new = apply_speckenv(values, mapping=mapping)
+    if isinstance(sources, str):
+        return dict.fromkeys(new, sources)
+    return {key: sources[key] for key in new}
 
 
 def read_speckenv(
-    filename: str = ".env", *, mapping: MutableMapping[str, str] = os.environ
-) -> None:
+    filename: str | Sequence[str] = ".env",
+    *,
+    mapping: MutableMapping[str, str] = os.environ,
+    snapshot: bool | str = False,
+) -> dict[str, str]:
     """
     Writes the values in ``.env`` in the current working folder into
     ``os.environ`` (or a different ``mapping``) if the keys do not exist
@@ -23,55 +234,1181 @@ def read_speckenv(
 
         DATABASE_URL=...
         CACHE_URL = '...'
-        SECRET_KEY = "...."
+        export SECRET_KEY = "...."  # Comment
         # Ignored
+
+    ``filename`` may also be a list of files. Files earlier in the list take
+    precedence, the same way values which appear earlier in a single file do.
+    The merged values are applied to the mapping in one step.
+
+    Returns a dictionary mapping the keys which have been written to the
+    file they came from.
+
+    Pass ``snapshot=True`` to cache the parsed values in ``<filename>.snapshot``
+    or pass the path of the snapshot file explicitly when reading one file.
     """
-    path = os.path.join(os.getcwd(), filename)
-    if not os.path.isfile(path):
-        warnings.warn(f"{filename} not a file, not reading anything", stacklevel=2)
-        return
-    # Not sure whether we should try handling other encodings than ASCII
-    # at all...
-    with open(path) as f:
-        lines = (line.strip() for line in f)
-        for line in lines:
-            if not line or line.startswith("#") or "=" not in line:
-                continue
-            key, value = tuple(v.strip(" \t") for v in line.split("=", 1))
-            mapping.setdefault(key, value)
+    files = _files(filename)
+    if isinstance(snapshot, str) and len(files) > 1:
+        raise ValueError("Explicit snapshot paths only work with a single file")
+    values, sources = _merge(
+        files, [_read(path, snapshot=snapshot) for _name, path in files]
+    )
+    return _apply(values, sources, mapping)
+
+
+async def aread_speckenv(
+    filename: str | Sequence[str] = ".env",
+    *,
+    mapping: MutableMapping[str, str] = os.environ,
+    snapshot: bool | str = False,
+) -> dict[str, str]:
+    """
+    Asynchronous version of ``read_speckenv``. The files are read
+    concurrently in the default executor, merged and applied to the mapping
+    the same way ``read_speckenv`` does it.
+    """
+    # asyncio is only needed here and is expensive to import
+    import asyncio
+
+    files = _files(filename)
+    if isinstance(snapshot, str) and len(files) > 1:
+        raise ValueError("Explicit snapshot paths only work with a single file")
+    contents = await asyncio.gather(
+        *(asyncio.to_thread(_read, path, snapshot=snapshot) for _name, path in files)
+    )
+    values, sources = _merge(files, contents)
+    return _apply(values, sources, mapping)
 
 
 def identity(x: T) -> T:
     return x
 
 
+_CONSTANTS = {"True": True, "False": False, "None": None}
+_CLOSING = {"[": "]", "(": ")", "{": "}"}
+_MISSING = object()
+
+# Strings without escapes, short ints, simple floats, constants and
+# punctuation. Everything else is handled by ast.literal_eval.
+_TOKEN_PATTERN = r"""[ \t]*(?:
+        '([^'\\\n\r\x00\ud800-\udfff]*)'
+      | "([^"\\\n\r\x00\ud800-\udfff]*)"
+      | (-?(?:0|[1-9][0-9]*)\.[0-9]+)
+      | (-?(?:0|[1-9][0-9]{0,17}))
+      | (True|False|None)
+      | ([][(){}:,])
+    )"""
+_TOKEN = None  # Compiled on first use
+
+
+def _atom(token):
+    index = token.lastindex
+    if index <= 2:
+        return token[index]
+    elif index == 3:
+        return float(token[3])
+    elif index == 4:
+        return int(token[4])
+    elif index == 5:
+        return _CONSTANTS[token[5]]
+    return _MISSING
+
+
+def _compile_token():
+    global _TOKEN  # noqa: PLW0603
+    import re
+
+    _TOKEN = re.compile(_TOKEN_PATTERN, re.VERBOSE)
+    return _TOKEN
+
+
+def _fast_literal_eval(value):
+    match = (_TOKEN or _compile_token()).match
+    end = len(value.rstrip(" \t"))
+    if not end or value[0] in " \t":
+        return _MISSING
+    if (token := match(value, 0, end)) is None:
+        return _MISSING
+    if (pos := token.end()) == end:
+        return _atom(token)
+
+    tokens = [token]
+    while pos < end:
+        token = match(value, pos, end)
+        if token is None or token[6] in _CLOSING:
+            # Nested containers are left to ast.literal_eval
+            return _MISSING
+        tokens.append(token)
+        pos = token.end()
+
+    opening, inner = tokens[0][6], tokens[1:-1]
+    if opening not in _CLOSING or _CLOSING[opening] != tokens[-1][6]:
+        return _MISSING
+
+    if opening == "{":
+        if len(inner) % 4 not in {0, 3}:
+            return _MISSING
+        result = {}
+        for i in range(0, len(inner), 4):
+            if inner[i + 1][6] != ":" or (
+                i + 3 < len(inner) and inner[i + 3][6] != ","
+            ):
+                return _MISSING
+            key, item = _atom(inner[i]), _atom(inner[i + 2])
+            if key is _MISSING or item is _MISSING:
+                return _MISSING
+            result[key] = item
+        return result
+
+    items = [_atom(token) for token in inner[::2]]
+    if _MISSING in items or any(token[6] != "," for token in inner[1::2]):
+        return _MISSING
+    if opening == "[":
+        return items
+    if len(inner) == 1:
+        # Parentheses without a comma do not create a tuple
+        return items[0]
+    return tuple(items)
+
+
+def literal_eval(value: str) -> Any:
+    """
+    Drop-in replacement for ``ast.literal_eval`` which handles common values
+    such as ``42``, ``True``, ``"foo"`` or ``["a", "b"]`` without building an
+    AST. Anything else is passed on to ``ast.literal_eval``.
+    """
+    if isinstance(value, str):
+        if value in _CONSTANTS:
+            return _CONSTANTS[value]
+        if (result := _fast_literal_eval(value)) is not _MISSING:
+            return result
+    import ast
+
+    return ast.literal_eval(value)
+
+
+def _evaluate(value: str, coerce: Callable[[Any], Any]) -> Any:
+    try:
+        return coerce(literal_eval(value))
+    except (SyntaxError, ValueError):
+        return coerce(value)
+
+
+def _copy(value: Any) -> Any:
+    """
+    Returns a copy of containers so that callers may mutate cached values.
+    """
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, set):
+        return set(value)
+    if type(value) is tuple:
+        return tuple(_copy(item) for item in value)
+    return value
+
+
+class LiteralCache:
+    """
+    Bounded LRU cache for ``env()`` which remembers the result of evaluating
+    and coercing raw values. Entries are keyed by ``(raw value, coerce)``, so
+    a changed value in the mapping is simply a new key and never returns stale
+    data.
+
+    Lists, dicts and sets are copied when they are returned, so callers may
+    mutate them. A ``maxsize`` of ``None`` disables eviction.
+
+    Example::
+
+        cache = LiteralCache(maxsize=512)
+        DEBUG = env("DEBUG", default=False, cache=cache)
+    """
+
+    def __init__(self, maxsize: int | None = 256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+        self._lock = _thread.allocate_lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def evaluate(self, value: str, coerce: Callable[[Any], Any] = identity) -> Any:
+        cache_key = (value, coerce)
+        with self._lock:
+            # Pop and reinsert to move the entry to the end
+            result = self._data.pop(cache_key, _MISSING)
+            if result is not _MISSING:
+                self._data[cache_key] = result
+                self.hits += 1
+                return _copy(result)
+            self.misses += 1
+
+        # Evaluate outside the lock, coerce may be slow or use the cache itself
+        result = _evaluate(value, coerce)
+        with self._lock:
+            self._data[cache_key] = result
+            if self.maxsize is not None and len(self._data) > self.maxsize:
+                # Dictionaries are ordered, the first key is the oldest
+                del self._data[next(iter(self._data))]
+        return _copy(result)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+def _readonly(self: EnvSnapshot, *args: Any, **kwargs: Any) -> NoReturn:
+    raise TypeError(f"{self.__class__.__name__} is read-only")
+
+
+class EnvSnapshot(dict):
+    """
+    Read-only dictionary of environment values for use as ``env()``'s
+    ``mapping``. Lookups do not have to encode and decode keys and values like
+    ``os.environ`` does and evaluated values are cached per snapshot.
+
+    Build the snapshot once, for example in the master process of a preforking
+    server, so that workers share it::
+
+        ENV = EnvSnapshot.from_environ(".env")
+        DEBUG = env("DEBUG", default=False, mapping=ENV)
+    """
+
+    __slots__ = ("cache",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Bounded because coerce functions (for example lambdas created per
+        # call) are part of the cache key
+        self.cache = LiteralCache(maxsize=1024)
+
+    @classmethod
+    def from_environ(
+        cls,
+        filename: str | Sequence[str] | None = None,
+        *,
+        environ: Mapping[str, str] = os.environ,
+        snapshot: bool | str = False,
+    ) -> EnvSnapshot:
+        """
+        Returns a snapshot of ``environ`` plus the values of ``filename`` (see
+        ``read_speckenv``) without modifying ``environ``.
+        """
+        values = dict(environ)
+        if filename is not None:
+            read_speckenv(filename, mapping=values, snapshot=snapshot)
+        return cls(values)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (self.__class__, (dict(self),))
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+class Tracer:
+    """
+    Records lookups by ``env()``, ``env_many()`` and the ``speckenv_django``
+    URL functions: the number of reads per key, the cumulative time spent
+    reading, evaluating and coercing values, how often the default has been
+    used and where the lookups came from. Values are never recorded.
+
+    ``callback`` is called with a dictionary describing each lookup.
+
+    Example::
+
+        with Tracer() as tracer:
+            import settings
+
+        print(tracer.to_json(indent=2))
+        tracer.unread()  # Keys in os.environ which haven't been read
+    """
+
+    def __init__(
+        self,
+        *,
+        callback: Callable[[dict[str, Any]], Any] | None = None,
+        call_sites: bool = True,
+    ) -> None:
+        self.callback = callback
+        self.call_sites = call_sites
+        self.keys: dict[str, dict[str, Any]] = {}
+        self._lock = _thread.allocate_lock()
+        self._previous: list[Tracer | None] = []
+
+    def record(
+        self,
+        key: str,
+        duration: float,
+        *,
+        default: bool = False,
+        stacklevel: int = 1,
+    ) -> None:
+        """
+        Records a lookup of ``key``. ``stacklevel`` works the same as with
+        ``warnings.warn`` and determines the recorded call site.
+        """
+        call_site = None
+        if self.call_sites or self.callback is not None:
+            frame = sys._getframe(stacklevel)
+            call_site = f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+        with self._lock:
+            if (stats := self.keys.get(key)) is None:
+                stats = self.keys[key] = {
+                    "reads": 0,
+                    "time": 0.0,
+                    "defaults": 0,
+                    "call_sites": {},
+                }
+            stats["reads"] += 1
+            stats["time"] += duration
+            stats["defaults"] += default
+            if self.call_sites:
+                sites = stats["call_sites"]
+                sites[call_site] = sites.get(call_site, 0) + 1
+
+        if self.callback is not None:
+            self.callback(
+                {
+                    "key": key,
+                    "duration": duration,
+                    "default": default,
+                    "call_site": call_site,
+                }
+            )
+
+    def unread(self, mapping: Mapping[str, str] = os.environ) -> list[str]:
+        """
+        Returns the keys of ``mapping`` which haven't been read.
+        """
+        return sorted(mapping.keys() - self.keys.keys())
+
+    def as_dict(self, mapping: Mapping[str, str] | None = None) -> dict[str, Any]:
+        """
+        Returns the recorded statistics, hottest keys first. The keys of
+        ``mapping`` which haven't been read are added if ``mapping`` is given.
+        """
+        with self._lock:
+            keys = {
+                key: stats | {"call_sites": dict(stats["call_sites"])}
+                for key, stats in sorted(
+                    self.keys.items(), key=lambda item: -item[1]["time"]
+                )
+            }
+        result = {"keys": keys}
+        if mapping is not None:
+            result["unread"] = self.unread(mapping)
+        return result
+
+    def to_json(self, mapping: Mapping[str, str] | None = None, **kwargs: Any) -> str:
+        import json
+
+        return json.dumps(self.as_dict(mapping), **kwargs)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.keys.clear()
+
+    def __enter__(self) -> Tracer:
+        self._previous.append(set_tracer(self))
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        set_tracer(self._previous.pop())
+
+
+_tracer: Tracer | None = None
+
+
+def set_tracer(tracer: Tracer | None) -> Tracer | None:
+    """
+    Installs ``tracer`` (or removes the active tracer if ``None``) and returns
+    the previously active tracer.
+    """
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
 def env(
     key: str,
     *,
     default: T = None,
     required: bool = False,
-    mapping: MutableMapping[str, str] = os.environ,
+    mapping: Mapping[str, str] = os.environ,
     coerce: Callable[[Any], Any] = identity,
-    warn: Union[bool, str] = False,
+    warn: bool | str = False,
+    cache: LiteralCache | None = None,
 ) -> T:
     """
     An easier way to read values from the environment (or from a different
     ``mapping``). Knows how to convert literals such as ``42``, ``None`` or
     ``[1, 2, 'c']`` into the correct type.
+
+    Pass a ``LiteralCache`` instance as ``cache`` to skip evaluating values
+    which have been seen before. ``EnvSnapshot`` mappings bring their own cache.
     """
+    if cache is None and isinstance(mapping, EnvSnapshot):
+        cache = mapping.cache
+    if (tracer := _tracer) is not None:
+        start = time.perf_counter()
     try:
         value = mapping[key]
-        return coerce(ast.literal_eval(value))
-    except (SyntaxError, ValueError):
-        return coerce(value)
     except KeyError:
-        if warn is True:
-            warnings.warn(f"Key '{key}' not available in environment", stacklevel=2)
-        elif warn:
-            warnings.warn(
-                f"Key '{key}' not available in environment ({warn})",
-                stacklevel=2,
-            )
+        _warn_missing(key, warn=warn, stacklevel=3)
         if required:
+            if tracer is not None:
+                tracer.record(key, time.perf_counter() - start, stacklevel=2)
             sys.exit(f"Exiting: Required key '{key}' missing")
-        return coerce(default)
+        result = coerce(default)
+        if tracer is not None:
+            tracer.record(key, time.perf_counter() - start, default=True, stacklevel=2)
+        return result
+    # Evaluate outside the try block, KeyErrors raised by coerce or the cache
+    # must not be mistaken for a missing key
+    if cache is not None:
+        result = cache.evaluate(value, coerce)
+    else:
+        result = _evaluate(value, coerce)
+    if tracer is not None:
+        tracer.record(key, time.perf_counter() - start, stacklevel=2)
+    return result
+
+
+def _warn_missing(key: str, *, warn: bool | str, stacklevel: int) -> None:
+    if not warn:
+        return
+    import warnings
+
+    if warn is True:
+        warnings.warn(
+            f"Key '{key}' not available in environment", stacklevel=stacklevel
+        )
+    elif warn:
+        warnings.warn(
+            f"Key '{key}' not available in environment ({warn})",
+            stacklevel=stacklevel,
+        )
+
+
+_ENV_OPTIONS = {"default", "required", "coerce", "warn"}
+
+
+def env_many(
+    spec: Mapping[str, Mapping[str, Any]],
+    *,
+    mapping: Mapping[str, str] = os.environ,
+    cache: LiteralCache | None = None,
+) -> dict[str, Any]:
+    """
+    Resolves many keys in one go. ``spec`` maps keys to the keyword arguments
+    ``env()`` would receive (``default``, ``required``, ``coerce`` and
+    ``warn``). Missing required keys are collected and reported together
+    instead of exiting at the first one.
+
+    Example::
+
+        settings = env_many({
+            "DEBUG": {"default": False},
+            "SECRET_KEY": {"required": True},
+            "ALLOWED_HOSTS": {"default": [], "coerce": list, "warn": True},
+        })
+    """
+    if cache is None and isinstance(mapping, EnvSnapshot):
+        cache = mapping.cache
+    tracer = _tracer
+    result = {}
+    missing = []
+    for key, options in spec.items():
+        if unknown := options.keys() - _ENV_OPTIONS:
+            raise TypeError(f"Unknown options for key '{key}': {sorted(unknown)}")
+        coerce = options.get("coerce", identity)
+        if tracer is not None:
+            start = time.perf_counter()
+        try:
+            value = mapping[key]
+        except KeyError:
+            _warn_missing(key, warn=options.get("warn", False), stacklevel=3)
+            if options.get("required"):
+                missing.append(key)
+            else:
+                result[key] = coerce(options.get("default"))
+            if tracer is not None:
+                tracer.record(
+                    key,
+                    time.perf_counter() - start,
+                    default=key in result,
+                    stacklevel=2,
+                )
+        else:
+            if cache is not None:
+                result[key] = cache.evaluate(value, coerce)
+            else:
+                result[key] = _evaluate(value, coerce)
+            if tracer is not None:
+                tracer.record(key, time.perf_counter() - start, stacklevel=2)
+    if missing:
+        keys = ", ".join(f"'{key}'" for key in missing)
+        sys.exit(f"Exiting: Required keys {keys} missing")
+    return result
+
+
+def _namespace_annotations(namespace: dict[str, Any]) -> dict[str, Any]:
+    if "__annotations__" in namespace:
+        return namespace["__annotations__"]
+    if sys.version_info >= (3, 14):
+        # PEP 649: Annotations are evaluated lazily and the class namespace
+        # only contains the function computing them
+        import annotationlib
+
+        if annotate := annotationlib.get_annotate_from_class_namespace(namespace):
+            return annotationlib.call_annotate_function(
+                annotate, annotationlib.Format.FORWARDREF
+            )
+    return {}
+
+
+class _SpecMeta(type):
+    def __new__(cls, name, bases, namespace, **kwargs):
+        fields = {}
+        for base in reversed(bases):
+            fields.update(getattr(base, "_fields", {}))
+        inherited = set(fields)
+
+        module = sys.modules.get(namespace.get("__module__", ""))
+        for field, hint in _namespace_annotations(namespace).items():
+            if field.startswith("_"):
+                continue
+            parser = _field_parser(field, _resolve_annotation(field, hint, module))
+            if field in namespace:
+                fields[field] = _field_options(parser, namespace.pop(field))
+            else:
+                fields[field] = {"coerce": parser, "required": True}
+
+        # Overridden defaults of inherited fields
+        for field in inherited & namespace.keys():
+            parser = fields[field]["coerce"]
+            fields[field] = _field_options(
+                getattr(parser, "__wrapped__", parser), namespace.pop(field)
+            )
+
+        namespace["__slots__"] = tuple(
+            field for field in fields if field not in inherited
+        )
+        namespace["_fields"] = fields
+        return super().__new__(cls, name, bases, namespace, **kwargs)
+
+
+def _field_options(parser: Callable[[Any], Any], default: Any) -> dict[str, Any]:
+    if default is None:
+        # None defaults are returned as-is instead of being coerced (str
+        # would turn them into 'None')
+        def coerce(value):
+            return None if value is None else parser(value)
+
+        coerce.__wrapped__ = parser
+        return {"coerce": coerce, "default": None}
+    return {"coerce": parser, "default": default}
+
+
+_BUILTIN_TYPES = {
+    cls.__name__: cls for cls in (bool, int, float, str, list, tuple, dict)
+}
+_CONTAINER_TYPES = {list, tuple, dict, set, frozenset}
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off"}
+
+
+def _resolve_annotation(field: str, hint: Any, module: Any) -> Any:
+    """
+    Evaluates string annotations (for example when using ``from __future__
+    import annotations``) in the namespace of the module defining the class.
+    """
+    if not isinstance(hint, str):
+        return hint
+    if hint in _BUILTIN_TYPES:
+        return _BUILTIN_TYPES[hint]
+    try:
+        return eval(hint, dict(vars(module)) if module else {})
+    except Exception as exc:
+        raise TypeError(f"{field}: Cannot resolve the annotation {hint!r}") from exc
+
+
+def _field_parser(field: str, annotation: Any) -> Callable[[Any], Any]:
+    """
+    Returns the coercion function for a ``Spec`` field. Booleans only accept
+    the usual spellings and containers only accept literals, calling ``bool``
+    or ``list`` on arbitrary strings silently produces nonsense. Annotations
+    which cannot be checked raise a ``TypeError`` instead of silently
+    accepting anything.
+    """
+    import types
+    import typing
+
+    if annotation is object or annotation is typing.Any:
+        return identity
+    # list[str] is an instance of type on Python < 3.11
+    if not isinstance(annotation, type) or isinstance(annotation, types.GenericAlias):
+        return _generic_field_parser(field, annotation)
+
+    if annotation is bool:
+
+        def parse(value):
+            if isinstance(value, bool):
+                return value
+            if (lowered := str(value).lower()) in _TRUE:
+                return True
+            if lowered in _FALSE:
+                return False
+            raise ValueError(f"{field}: {value!r} is not a boolean value")
+
+    elif annotation in _CONTAINER_TYPES:
+
+        def parse(value):
+            if isinstance(value, str):
+                raise ValueError(
+                    f"{field}: {value!r} is not a {annotation.__name__} literal"
+                )
+            return annotation(value)
+
+    else:
+
+        def parse(value):
+            try:
+                return annotation(value)
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"{field}: {value!r} is invalid ({exc})") from exc
+
+    return parse
+
+
+def _generic_field_parser(field: str, annotation: Any) -> Callable[[Any], Any]:
+    import types
+    import typing
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin in {typing.Union, getattr(types, "UnionType", typing.Union)}:
+        if len(args) != 2 or type(None) not in args:
+            raise TypeError(
+                f"{field}: Only optional unions are supported, not {annotation!r}"
+            )
+        (inner,) = (arg for arg in args if arg is not type(None))
+        parser = _field_parser(field, inner)
+        return lambda value: None if value is None else parser(value)
+    if origin in _CONTAINER_TYPES:
+        # The items are not checked
+        return _field_parser(field, origin)
+    raise TypeError(f"{field}: Unsupported annotation {annotation!r}")
+
+
+class Spec(metaclass=_SpecMeta):
+    """
+    Declarative settings, resolved once using ``env_many()`` and stored in
+    slots. Annotations are used for coercion, fields without a default are
+    required.
+
+    Example::
+
+        class Settings(Spec):
+            DEBUG: bool = False
+            SECRET_KEY: str
+            ALLOWED_HOSTS: list = []
+
+        settings = Settings()
+        settings.DEBUG
+    """
+
+    def __init__(
+        self,
+        *,
+        mapping: Mapping[str, str] = os.environ,
+        cache: LiteralCache | None = None,
+    ) -> None:
+        for field, value in env_many(
+            self._fields, mapping=mapping, cache=cache
+        ).items():
+            setattr(self, field, value)
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self._fields
+        )
+        return f"{self.__class__.__name__}({values})"
+
+    def __getstate__(self) -> tuple[Any, ...]:
+        return tuple(getattr(self, field) for field in self._fields)
+
+    def __setstate__(self, state: tuple[Any, ...]) -> None:
+        for field, value in zip(self._fields, state):
+            setattr(self, field, value)
+
+
+def _forward(function: Callable[..., Any]) -> Callable[..., Any]:
+    def method(self: LazyValue, *args: Any) -> Any:
+        return function(self._resolve(), *args)
+
+    return method
+
+
+def _reflected(function: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    return lambda value, other: function(other, value)
+
+
+class LazyValue:
+    """
+    Proxy returned by ``lazy_env()`` which reads and evaluates the value the
+    first time it is used.
+    """
+
+    __slots__ = ("__weakref__", "_key", "_options", "_value")
+
+    def __init__(self, key: str, options: dict[str, Any]) -> None:
+        self._key = key
+        self._options = options
+        self._value = _MISSING
+
+    def _resolve(self) -> Any:
+        if self._value is _MISSING:
+            self._value = env(self._key, **self._options)
+        return self._value
+
+    def __getattr__(self, name: str) -> Any:
+        if name in LazyValue.__slots__:
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
+
+    __bool__ = _forward(bool)
+    __str__ = _forward(str)
+    __repr__ = _forward(repr)
+    __format__ = _forward(format)
+    __hash__ = _forward(hash)
+    __int__ = _forward(int)
+    __float__ = _forward(float)
+    __index__ = _forward(_operator.index)
+    __fspath__ = _forward(os.fspath)
+    __len__ = _forward(len)
+    __iter__ = _forward(iter)
+    __getitem__ = _forward(_operator.getitem)
+    __contains__ = _forward(_operator.contains)
+    __eq__ = _forward(_operator.eq)
+    __ne__ = _forward(_operator.ne)
+    __lt__ = _forward(_operator.lt)
+    __le__ = _forward(_operator.le)
+    __gt__ = _forward(_operator.gt)
+    __ge__ = _forward(_operator.ge)
+    __add__ = _forward(_operator.add)
+    __radd__ = _forward(_reflected(_operator.add))
+    __sub__ = _forward(_operator.sub)
+    __rsub__ = _forward(_reflected(_operator.sub))
+    __mul__ = _forward(_operator.mul)
+    __rmul__ = _forward(_reflected(_operator.mul))
+    __truediv__ = _forward(_operator.truediv)
+    __rtruediv__ = _forward(_reflected(_operator.truediv))
+    __floordiv__ = _forward(_operator.floordiv)
+    __rfloordiv__ = _forward(_reflected(_operator.floordiv))
+    __mod__ = _forward(_operator.mod)
+    __rmod__ = _forward(_reflected(_operator.mod))
+    __divmod__ = _forward(divmod)
+    __rdivmod__ = _forward(_reflected(divmod))
+    __pow__ = _forward(pow)
+    __rpow__ = _forward(_reflected(pow))
+    __and__ = _forward(_operator.and_)
+    __rand__ = _forward(_reflected(_operator.and_))
+    __or__ = _forward(_operator.or_)
+    __ror__ = _forward(_reflected(_operator.or_))
+    __xor__ = _forward(_operator.xor)
+    __rxor__ = _forward(_reflected(_operator.xor))
+    __lshift__ = _forward(_operator.lshift)
+    __rlshift__ = _forward(_reflected(_operator.lshift))
+    __rshift__ = _forward(_operator.rshift)
+    __rrshift__ = _forward(_reflected(_operator.rshift))
+    __neg__ = _forward(_operator.neg)
+    __pos__ = _forward(_operator.pos)
+    __abs__ = _forward(abs)
+    __invert__ = _forward(_operator.invert)
+    __round__ = _forward(round)
+    __trunc__ = _forward(lambda value: value.__trunc__())
+    __floor__ = _forward(lambda value: value.__floor__())
+    __ceil__ = _forward(lambda value: value.__ceil__())
+    __complex__ = _forward(complex)
+    __bytes__ = _forward(bytes)
+    __reversed__ = _forward(reversed)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._resolve()(*args, **kwargs)
+
+
+_lazy_values: weakref.WeakValueDictionary[int, LazyValue] | None = None
+
+
+_LAZY_ENV_OPTIONS = _ENV_OPTIONS | {"mapping", "cache"}
+
+
+def lazy_env(key: str, **options: Any) -> Any:
+    """
+    Same as ``env()``, but the value is only read and evaluated when it is
+    used for the first time. Accepts the same keyword arguments as ``env()``.
+    Note that missing required keys only exit when the value is used.
+    """
+    if unknown := options.keys() - _LAZY_ENV_OPTIONS:
+        raise TypeError(f"Unknown options for key '{key}': {sorted(unknown)}")
+    global _lazy_values  # noqa: PLW0603
+    if _lazy_values is None:
+        import weakref
+
+        _lazy_values = weakref.WeakValueDictionary()
+
+    value = LazyValue(key, options)
+    _lazy_values[id(value)] = value
+    return value
+
+
+def lazy_env_stats() -> dict[str, Any]:
+    """
+    Returns the number of ``lazy_env()`` values which are still alive and the
+    keys of those which haven't been used yet.
+    """
+    values = [] if _lazy_values is None else list(_lazy_values.values())
+    unused = [value._key for value in values if value._value is _MISSING]
+    return {
+        "declared": len(values),
+        "materialized": len(values) - len(unused),
+        "unused": unused,
+    }
+
+
+class Watcher:
+    """
+    Watches one or several files (see ``read_speckenv``) and applies changed
+    values to the mapping. Only keys the watcher has written itself are updated
+    or removed later, values which existed in the mapping before still win.
+
+    Callbacks receive a dictionary mapping changed keys to ``(old, new)``
+    tuples; ``None`` stands for missing values. ``reload_duration`` contains
+    the duration of the last reload in seconds.
+
+    Example::
+
+        watcher = Watcher(".env")
+        watcher.callbacks.append(lambda changes: print(changes))
+        watcher.check()  # Reload on demand, or:
+        watcher.start(interval=5)  # Poll in a background thread
+    """
+
+    def __init__(
+        self,
+        filename: str | Sequence[str] = ".env",
+        *,
+        mapping: MutableMapping[str, str] = os.environ,
+    ) -> None:
+        import threading
+
+        self.filename = filename
+        self.mapping = mapping
+        self.callbacks: list[Callable[[dict[str, tuple[Any, Any]]], Any]] = []
+        self.reload_duration: float | None = None
+        self._stat = None
+        self._contents = {}
+        self._values = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat_files(self) -> list[tuple[str, tuple[int, int] | None]]:
+        filenames = [self.filename] if isinstance(self.filename, str) else self.filename
+        cwd = os.getcwd()
+        result = []
+        for name in filenames:
+            path = os.path.join(cwd, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                result.append((path, None))
+            else:
+                result.append((path, (stat.st_mtime_ns, stat.st_size)))
+        return result
+
+    def _read_files(
+        self, stat: list[tuple[str, tuple[int, int] | None]]
+    ) -> list[dict[str, str]]:
+        contents = []
+        for path, file_stat in stat:
+            if file_stat is None:
+                if path not in self._contents:
+                    import warnings
+
+                    warnings.warn(
+                        f"{path} not a file, not reading anything", stacklevel=3
+                    )
+                # Probably being replaced, keep the last values (if any) until
+                # the file is back
+                contents.append(self._contents.get(path, {}))
+            else:
+                # Raises OSError if the file vanished after os.stat()
+                contents.append(_read(path, snapshot=False))
+        return contents
+
+    def check(self) -> dict[str, tuple[Any, Any]]:
+        """
+        Reloads the files if their modification time or size changed and
+        returns the changes. Missing files keep contributing the values they
+        had when they have been read the last time, files which cannot be read
+        are retried during the next check.
+        """
+        with self._lock:
+            if (stat := self._stat_files()) == self._stat:
+                return {}
+            start = time.perf_counter()
+            try:
+                contents = self._read_files(stat)
+            except OSError:
+                # Try again next time
+                return {}
+            self._stat = stat
+            self._contents = {
+                path: content for (path, _), content in zip(stat, contents)
+            }
+            return self._reload(contents, start)
+
+    def _reload(
+        self, contents: list[dict[str, str]], start: float
+    ) -> dict[str, tuple[Any, Any]]:
+        values = {}
+        # Earlier files take precedence
+        for content in reversed(contents):
+            values.update(content)
+
+        changes = {}
+        owned = {}
+        for key, value in values.items():
+            if key in self._values:
+                if (old := self._values[key]) != value:
+                    self.mapping[key] = value
+                    changes[key] = (old, value)
+            elif key in self.mapping:
+                continue
+            else:
+                self.mapping[key] = value
+                changes[key] = (None, value)
+            owned[key] = value
+        for key in self._values.keys() - owned.keys():
+            self.mapping.pop(key, None)
+            changes[key] = (self._values[key], None)
+        self._values = owned
+        self.reload_duration = time.perf_counter() - start
+
+        if changes:
+            for callback in self.callbacks:
+                callback(changes)
+        return changes
+
+    def start(self, *, interval: float = 1.0) -> None:
+        """
+        Starts polling the files in a daemon thread.
+        """
+        if self._thread is not None:
+            return
+        import threading
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="speckenv-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, interval: float) -> None:
+        self.check()
+        while not self._stop.wait(interval):
+            self.check()
+
+
+def _render(value: Any, imports: set[str]) -> str:
+    """
+    Returns Python source code evaluating to ``value``. Sets are sorted so that
+    the output doesn't depend on the hash seed.
+    """
+    from pathlib import PurePath
+
+    if isinstance(value, float) and value - value != 0:
+        # inf, -inf and nan have no literal syntax
+        return f"float({repr(value)!r})"
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return repr(value)
+    if isinstance(value, dict):
+        items = (
+            f"{_render(key, imports)}: {_render(item, imports)}"
+            for key, item in value.items()
+        )
+        return "{" + ", ".join(items) + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(_render(item, imports) for item in value) + "]"
+    if isinstance(value, tuple):
+        items = [_render(item, imports) for item in value]
+        return "(" + ", ".join(items) + ("," if len(items) == 1 else "") + ")"
+    if isinstance(value, (set, frozenset)):
+        items = ", ".join(sorted(_render(item, imports) for item in value))
+        source = f"{{{items}}}" if items else "set()"
+        return f"frozenset({source})" if isinstance(value, frozenset) else source
+    if isinstance(value, PurePath):
+        imports.add("from pathlib import Path")
+        return f"Path({str(value)!r})"
+    raise TypeError(f"Cannot compile values of type {type(value).__name__}")
+
+
+def _converter(name: str) -> Callable[[Any], Any]:
+    """
+    Returns ``speckenv_django.django_<name>_url`` or the function at the
+    dotted path ``name``.
+    """
+    import importlib
+
+    module, _, function = name.rpartition(".")
+    if not module:
+        module, function = "speckenv_django", f"django_{name}_url"
+    try:
+        return getattr(importlib.import_module(module), function)
+    except (ImportError, AttributeError) as exc:
+        raise ValueError(f"Unknown converter '{name}'") from exc
+
+
+def _named_converter(name: str, convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def coerce(value):
+        try:
+            return convert(value)
+        except (KeyError, TypeError, ValueError) as exc:
+            # For example KeyError for unknown schemes of django_*_url
+            raise ValueError(f"{name}: {exc.__class__.__name__}: {exc}") from exc
+
+    return coerce
+
+
+def compile_speckenv(
+    keys: Sequence[str],
+    filename: str | Sequence[str] = ".env",
+    *,
+    mapping: Mapping[str, str] = os.environ,
+) -> str:
+    """
+    Reads ``filename`` the same way ``read_speckenv`` does without modifying
+    ``mapping``, resolves ``keys`` and returns the source code of a Python
+    module assigning the final values. Keys may name a converter after a colon,
+    either one of the ``django_*_url`` functions (``DATABASE_URL:database``)
+    or the dotted path of a function (``ALLOWED_HOSTS:myproject.env.hosts``).
+    All keys are required.
+    """
+    import keyword
+
+    spec = {}
+    for key in keys:
+        name, _, converter = key.partition(":")
+        if not name.isidentifier() or keyword.iskeyword(name):
+            raise ValueError(f"'{name}' is not a valid Python identifier")
+        spec[name] = {"required": True}
+        if converter:
+            spec[name]["coerce"] = _named_converter(name, _converter(converter))
+
+    values = dict(mapping)
+    read_speckenv(filename, mapping=values)
+    imports = set()
+    lines = [
+        f"{key} = {_render(value, imports)}"
+        for key, value in env_many(spec, mapping=values).items()
+    ]
+    filenames = [filename] if isinstance(filename, str) else filename
+    return "\n".join(
+        [
+            f"# Generated by speckenv from {', '.join(filenames)}. Do not edit, run",
+            "# python -m speckenv compile again instead.",
+            *sorted(imports),
+            "",
+            *lines,
+            "",
+        ]
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Entry point of ``python -m speckenv``.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m speckenv")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser(
+        "compile",
+        help="write a Python module containing the resolved values",
+        description=compile_speckenv.__doc__,
+    )
+    command.add_argument("keys", nargs="+", metavar="KEY[:CONVERTER]")
+    command.add_argument(
+        "-f",
+        "--file",
+        dest="files",
+        action="append",
+        metavar="FILE",
+        help="the .env file(s) to read, earlier files take precedence (default: .env)",
+    )
+    command.add_argument("-o", "--output", required=True, metavar="FILE")
+    command.add_argument(
+        "--ignore-environ",
+        action="store_true",
+        help="only use the files, not the values in the process environment",
+    )
+    command.add_argument(
+        "--check",
+        action="store_true",
+        help="exit with status 1 if the output file is missing or out of date",
+    )
+    args = parser.parse_args(argv)
+
+    filenames = args.files or [".env"]
+    try:
+        source = compile_speckenv(
+            args.keys,
+            filenames,
+            mapping={} if args.ignore_environ else os.environ,
+        )
+    except (TypeError, ValueError) as exc:
+        parser.error(str(exc))
+
+    try:
+        with open(args.output) as f:
+            current = f.read()
+    except OSError:
+        current = None
+    if args.check:
+        if current != source:
+            print(f"{args.output} is out of date", file=sys.stderr)
+            return 1
+    elif current != source:
+        # The module contains the same secrets as the files, use the most
+        # restrictive permissions of all of them
+        modes = [os.stat(name).st_mode for name in filenames if os.path.isfile(name)]
+        mode = 0o777 if modes else 0o600
+        for file_mode in modes:
+            mode &= file_mode
+
+        # Write atomically so that processes never import a partial module
+        tmp = f"{args.output}.{os.getpid()}.tmp"
+        with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), "w") as f:
+            f.write(source)
+        os.replace(tmp, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
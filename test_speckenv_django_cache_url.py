@@ -58,6 +58,108 @@ class DjangoCacheURLTest(TestCase):
             },
         )
 
+    def test_parse_redis_replicas_with_credentials(self):
+        self.assertEqual(
+            django_cache_url("redis://u:p@h1:6379,h2:6379,[::1]:6380/")["LOCATION"],
+            ["redis://u:p@h1:6379", "redis://u:p@h2:6379", "redis://u:p@[::1]:6380"],
+        )
+        self.assertEqual(
+            django_cache_url("redis://:secret@h1,h2/")["LOCATION"],
+            ["redis://:secret@h1", "redis://:secret@h2"],
+        )
+
+    def test_parse_redis_options(self):
+        url = (
+            "redis://localhost:6379/2?max_connections=50&socket_timeout=0.5"
+            "&socket_connect_timeout=2&health_check_interval=30"
+            "&pool_class=redis.BlockingConnectionPool"
+            "&parser_class=redis.connection._HiredisParser"
+            "&serializer=app.cache.MsgPackSerializer&unknown=ignored"
+        )
+        self.assertEqual(
+            django_cache_url(url)["OPTIONS"],
+            {
+                "db": "2",
+                "max_connections": 50,
+                "socket_timeout": 0.5,
+                "socket_connect_timeout": 2.0,
+                "health_check_interval": 30,
+                "pool_class": "redis.BlockingConnectionPool",
+                "parser_class": "redis.connection._HiredisParser",
+                "serializer": "app.cache.MsgPackSerializer",
+            },
+        )
+
+    def test_invalid_redis_options(self):
+        for query in [
+            "max_connections=many",
+            "socket_timeout=-1",
+            "pool_class=BlockingConnectionPool",
+            "serializer=app.cache.",
+        ]:
+            with self.subTest(query=query), self.assertRaises(ValueError):
+                django_cache_url(f"hiredis://localhost:6379/?{query}")
+
+    def test_parse_pymemcache_url(self):
+        url = (
+            "pymemcache://10.0.0.1:11211,10.0.0.2:11211/?key_prefix=example_com"
+            "&use_pooling=true&max_pool_size=8&ignore_exc=1&timeout=0.2"
+        )
+        self.assertEqual(
+            django_cache_url(url),
+            {
+                "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+                "LOCATION": ["10.0.0.1:11211", "10.0.0.2:11211"],
+                "KEY_PREFIX": "example_com",
+                "OPTIONS": {
+                    "use_pooling": True,
+                    "max_pool_size": 8,
+                    "ignore_exc": True,
+                    "timeout": 0.2,
+                },
+            },
+        )
+        self.assertEqual(
+            django_cache_url("pymemcache://localhost:11211")["LOCATION"],
+            "localhost:11211",
+        )
+        self.assertEqual(
+            django_cache_url("pymemcache://[::1]:11211,h2")["LOCATION"],
+            ["[::1]:11211", "h2"],
+        )
+        self.assertEqual(
+            django_cache_url("pymemcache:///run/memcached.sock")["LOCATION"],
+            "unix:/run/memcached.sock",
+        )
+        with self.assertRaises(ValueError):
+            django_cache_url("pymemcache://localhost:11211?use_pooling=perhaps")
+
+    def test_parse_file_url(self):
+        self.assertEqual(
+            django_cache_url("file:///var/tmp/django_cache?max_entries=1000"),
+            {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": "/var/tmp/django_cache",
+                "KEY_PREFIX": "",
+                "OPTIONS": {"MAX_ENTRIES": 1000},
+            },
+        )
+        with self.assertRaises(ValueError):
+            django_cache_url("file://example.com/var/tmp/django_cache")
+
+    def test_parse_db_url(self):
+        self.assertEqual(
+            django_cache_url("db://cache_table?key_prefix=stuff&cull_frequency=4"),
+            {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "cache_table",
+                "KEY_PREFIX": "stuff",
+                "OPTIONS": {"CULL_FREQUENCY": 4},
+            },
+        )
+        with self.assertRaises(ValueError):
+            django_cache_url("db:///")
+
     def test_parse_locmem_url(self):
         self.assertEqual(
             django_cache_url("locmem://"),
@@ -89,3 +191,8 @@ class DjangoCacheURLTest(TestCase):
     def test_parse_unknown(self):
         with self.assertRaises(KeyError):
             django_cache_url("unknown://")
+
+    def test_cache(self):
+        url = "redis://10.0.0.1:6379,10.0.0.2:6379/"
+        django_cache_url(url)["LOCATION"].append("redis://10.0.0.3:6379")
+        self.assertEqual(len(django_cache_url(url)["LOCATION"]), 2)
@@ -1,6 +1,16 @@
+from types import SimpleNamespace
 from unittest import TestCase
 
-from speckenv_django import django_database_url
+from speckenv_django import (
+    ReplicaRouter,
+    django_database_replicas,
+    django_database_url,
+)
+
+
+def instance(db):
+    # Stand-in for model instances, routers only look at _state.db
+    return SimpleNamespace(_state=SimpleNamespace(db=db))
 
 
 class DjangoDatabaseURLTest(TestCase):
@@ -61,6 +71,233 @@ class DjangoDatabaseURLTest(TestCase):
             },
         )
 
+    def test_pool(self):
+        url = "postgres://localhost/example_com?pool=true&conn_health_checks=yes"
+        config = django_database_url(url)
+        self.assertEqual(config["OPTIONS"], {"pool": True})
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+
+        url = (
+            "postgis://localhost/example_com"
+            "?pool_min_size=2&pool_max_size=10&pool_timeout=2.5&conn_max_age=0"
+        )
+        config = django_database_url(url)
+        self.assertEqual(
+            config["OPTIONS"],
+            {"pool": {"min_size": 2, "max_size": 10, "timeout": 2.5}},
+        )
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+
+        config = django_database_url("postgres://localhost/example_com?pool=off")
+        self.assertNotIn("OPTIONS", config)
+
+    def test_invalid_pool(self):
+        for url in [
+            "postgres://localhost/db?pool=maybe",
+            "postgres://localhost/db?pool_max_size=-1",
+            "postgres://localhost/db?pool_max_size=ten",
+            "postgres://localhost/db?pool=false&pool_max_size=10",
+            "postgres://localhost/db?pool_min_size=5&pool_max_size=2",
+            "postgres://localhost/db?pool=true&conn_max_age=60",
+            "mysql://localhost/db?pool=true",
+        ]:
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                django_database_url(url)
+
+    def test_multiple_hosts(self):
+        url = "postgres://user:pass@h1:5432,h2:5433,h3/db?target_session_attrs=primary"
+        self.assertEqual(
+            django_database_url(url),
+            {
+                "ENGINE": "django.db.backends.postgresql",
+                "NAME": "db",
+                "USER": "user",
+                "PASSWORD": "pass",
+                "HOST": "h1,h2,h3",
+                "PORT": "5432,5433,",
+                "OPTIONS": {"target_session_attrs": "primary"},
+            },
+        )
+        for url in [
+            "mysql://h1,h2/db",
+            "postgres://h1,:5432/db",
+            "postgres://h1:port,h2/db",
+            "postgres://h1/db?target_session_attrs=write",
+            "sqlite:///db.sqlite3?target_session_attrs=any",
+        ]:
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                django_database_url(url)
+
+    def test_replicas(self):
+        databases, router = django_database_replicas(
+            "postgres://primary/db",
+            ["postgres://r1/db?weight=3", "postgres://r2/db"],
+        )
+        self.assertEqual(
+            databases["replica_1"],
+            {
+                "ENGINE": "django.db.backends.postgresql",
+                "NAME": "db",
+                "USER": "",
+                "PASSWORD": "",
+                "HOST": "r1",
+                "PORT": "",
+                "TEST": {"MIRROR": "default"},
+            },
+        )
+        self.assertEqual(databases["default"]["HOST"], "primary")
+        self.assertEqual(databases["replica_2"]["HOST"], "r2")
+        self.assertEqual(router.replicas, {"replica_1": 3, "replica_2": 1})
+        self.assertIn(router.db_for_read(None), {"replica_1", "replica_2"})
+        self.assertEqual(router.db_for_write(None), "default")
+        self.assertTrue(router.allow_migrate("default", "app"))
+        self.assertFalse(router.allow_migrate("replica_1", "app"))
+
+        with self.assertRaises(ValueError):
+            django_database_replicas("postgres://p/db", ["postgres://r/db?weight=0"])
+
+    def test_multiple_hosts_replicas(self):
+        databases, router = django_database_replicas("postgres://h1,h2/db")
+        self.assertEqual(
+            databases["default"]["OPTIONS"], {"target_session_attrs": "read-write"}
+        )
+        self.assertEqual(
+            databases["replica_1"]["OPTIONS"],
+            {"target_session_attrs": "prefer-standby"},
+        )
+        self.assertEqual(databases["replica_1"]["HOST"], "h1,h2")
+        self.assertEqual(router.db_for_read(None), "replica_1")
+
+    def test_router(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(None), "default")
+        self.assertTrue(router.allow_relation(instance("default"), instance("default")))
+        with self.assertRaises(ValueError):
+            ReplicaRouter("default", {"replica": -1})
+
+    def test_router_other_databases(self):
+        router = ReplicaRouter("default", {"replica": 1})
+        self.assertEqual(router.db_for_read(None), "replica")
+        self.assertEqual(router.db_for_write(None), "default")
+        self.assertEqual(
+            router.db_for_read(None, instance=instance("replica")), "replica"
+        )
+        self.assertEqual(
+            router.db_for_write(None, instance=instance("replica")), "default"
+        )
+        self.assertIsNone(router.db_for_read(None, instance=instance("legacy")))
+        self.assertIsNone(router.db_for_write(None, instance=instance("legacy")))
+
+        self.assertTrue(router.allow_relation(instance("default"), instance("replica")))
+        self.assertIsNone(
+            router.allow_relation(instance("default"), instance("legacy"))
+        )
+
+        self.assertTrue(router.allow_migrate("default", "app"))
+        self.assertFalse(router.allow_migrate("replica", "app"))
+        self.assertIsNone(router.allow_migrate("legacy", "app"))
+
+    def test_sqlite_options(self):
+        url = (
+            "sqlite:///db.sqlite3?journal_mode=wal&synchronous=NORMAL"
+            "&cache_size=-20000&mmap_size=134217728&busy_timeout=5000"
+            "&transaction_mode=immediate"
+        )
+        self.assertEqual(
+            django_database_url(url),
+            {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": "db.sqlite3",
+                "USER": "",
+                "PASSWORD": "",
+                "HOST": "",
+                "PORT": "",
+                "OPTIONS": {
+                    "init_command": (
+                        "PRAGMA journal_mode=WAL;PRAGMA synchronous=NORMAL;"
+                        "PRAGMA cache_size=-20000;PRAGMA mmap_size=134217728"
+                    ),
+                    "transaction_mode": "IMMEDIATE",
+                    "timeout": 5.0,
+                },
+            },
+        )
+        for url in [
+            "sqlite:///db.sqlite3?journal_mode=fast",
+            "sqlite:///db.sqlite3?synchronous=4",
+            "sqlite:///db.sqlite3?busy_timeout=-1",
+            "sqlite:///db.sqlite3?transaction_mode=lazy",
+            "postgres://localhost/db?journal_mode=wal",
+        ]:
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                django_database_url(url)
+
+    def test_postgres_options(self):
+        url = (
+            "postgres://localhost/db?disable_server_side_cursors=true"
+            "&prepare_threshold=none&connect_timeout=5&sslmode=verify-full"
+            "&options=-c%20search_path%3Dapp&statement_timeout=30000"
+            "&lock_timeout=1000&server_side_binding=no&unknown=ignored"
+        )
+        config = django_database_url(url)
+        self.assertTrue(config["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertEqual(
+            config["OPTIONS"],
+            {
+                "server_side_binding": False,
+                "prepare_threshold": None,
+                "connect_timeout": 5,
+                "sslmode": "verify-full",
+                "options": (
+                    "-c search_path=app -c statement_timeout=30000 -c lock_timeout=1000"
+                ),
+            },
+        )
+        self.assertEqual(
+            django_database_url("postgres://localhost/db?prepare_threshold=0")[
+                "OPTIONS"
+            ],
+            {"prepare_threshold": 0},
+        )
+
+    def test_mysql_options(self):
+        url = (
+            "mysql://localhost/db?charset=utf8mb4&connect_timeout=3"
+            "&init_command=SET%20sql_mode%3D%27STRICT_TRANS_TABLES%27"
+            "&isolation_level=READ%20COMMITTED"
+        )
+        self.assertEqual(
+            django_database_url(url)["OPTIONS"],
+            {
+                "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
+                "charset": "utf8mb4",
+                "connect_timeout": 3,
+                "isolation_level": "read committed",
+            },
+        )
+
+    def test_invalid_engine_options(self):
+        for url in [
+            "postgres://localhost/db?sslmode=always",
+            "postgres://localhost/db?connect_timeout=soon",
+            "postgres://localhost/db?charset=utf8",
+            "mysql://localhost/db?sslmode=require",
+            "mysql://localhost/db?isolation_level=snapshot",
+            "sqlite:///db.sqlite3?connect_timeout=5",
+        ]:
+            with self.subTest(url=url), self.assertRaises(ValueError):
+                django_database_url(url)
+
     def test_parse_unknown(self):
         with self.assertRaises(KeyError):
             django_database_url("unknown://")
+
+    def test_cache(self):
+        django_database_url.cache_clear()
+        url = "postgres://localhost:5432/example_com"
+        config = django_database_url(url)
+        config["NAME"] = "changed"
+        self.assertEqual(django_database_url(url)["NAME"], "example_com")
+
+        info = django_database_url.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
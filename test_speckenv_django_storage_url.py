@@ -135,3 +135,72 @@ class DjangoStorageURLTest(TestCase):
                 },
             },
         )
+
+    def test_s3_performance_options(self):
+        url = (
+            "s3://key:secret@bucket.s3.eu-central-1.amazonaws.com/"
+            "?aws_s3_max_age_seconds=31536000&aws_s3_use_threads=yes"
+            "&aws_s3_max_pool_connections=20&aws_s3_metadata={'x': 'y'}"
+            "&aws_s3_public_url=https://cdn.example.com/"
+        )
+        options = django_storage_url(url)["OPTIONS"]
+        self.assertEqual(options["aws_s3_max_age_seconds"], 31536000)
+        self.assertTrue(options["aws_s3_use_threads"])
+        self.assertEqual(options["aws_s3_max_pool_connections"], 20)
+        self.assertEqual(options["aws_s3_metadata"], {"x": "y"})
+        self.assertEqual(options["aws_s3_public_url"], "https://cdn.example.com/")
+
+    def test_s3_invalid_options(self):
+        base = "s3://key:secret@bucket.s3.eu-central-1.amazonaws.com/?"
+        for query in [
+            "aws_s3_gzip=maybe",
+            "aws_s3_max_age_seconds=-1",
+            "aws_s3_metadata=[1]",
+            "aws_s3_addressing_style=diagonal",
+        ]:
+            with self.subTest(query=query), self.assertRaises(ValueError):
+                django_storage_url(base + query)
+
+        with self.assertRaisesRegex(
+            ValueError, "did you mean 'aws_s3_max_age_seconds'"
+        ):
+            django_storage_url(base + "aws_s3_max_age_secondz=60")
+
+    def test_other_s3_minio(self):
+        url = (
+            "s3://minio:minio123@localhost:9000/media/uploads/"
+            "?aws_s3_endpoint_url=http://localhost:9000&aws_region=us-east-1"
+            "&aws_s3_addressing_style=path"
+        )
+        self.assertEqual(
+            django_storage_url(url),
+            {
+                "BACKEND": "django_s3_storage.storage.S3Storage",
+                "OPTIONS": {
+                    "aws_access_key_id": "minio",
+                    "aws_secret_access_key": "minio123",
+                    "aws_region": "us-east-1",
+                    "aws_s3_endpoint_url": "http://localhost:9000",
+                    "aws_s3_addressing_style": "path",
+                    "aws_s3_bucket_name": "media",
+                    "aws_s3_key_prefix": "uploads",
+                },
+            },
+        )
+
+    def test_cache(self):
+        django_storage_url.cache_clear()
+        url = "file:./relative/"
+        config = django_storage_url(url, base_dir=Path("/one/"))
+        config["OPTIONS"]["base_url"] = "/changed/"
+        self.assertEqual(
+            django_storage_url(url, base_dir=Path("/one/"))["OPTIONS"],
+            {"base_url": None, "location": Path("/one/relative/")},
+        )
+        self.assertEqual(
+            django_storage_url(url, base_dir=Path("/two/"))["OPTIONS"]["location"],
+            Path("/two/relative/"),
+        )
+
+        info = django_storage_url.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 2))